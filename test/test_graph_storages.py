@@ -7,14 +7,31 @@
 # LICENSE.txt file in the root directory of this source tree.
 
 import tempfile
-from unittest import TestCase, main
+from unittest import TestCase, main, skipUnless
+from unittest.mock import patch
 
 import h5py
 import numpy as np
 import torch
+
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
 from torch_extensions.tensorlist.tensorlist import TensorList
 
-from torchbiggraph.graph_storages import FileEdgeAppender
+from torchbiggraph.edgelist import EdgeList
+from torchbiggraph.entitylist import EntityList
+from torchbiggraph.graph_storages import (
+    AsyncEdgeLoader,
+    BufferedDataset,
+    FileEdgeAppender,
+    FileEdgeStorage,
+    FORMAT_VERSION,
+    FORMAT_VERSION_ATTR,
+    SingleFileEdgeStorage,
+)
 
 
 class TestFileEdgeAppender(TestCase):
@@ -57,6 +74,33 @@ class TestFileEdgeAppender(TestCase):
                     np.arange(10, 1_000_000, dtype=np.int64),
                 )
 
+    def test_tensors_larger_than_buffer(self):
+        large_size = 3 * BufferedDataset.BUFFER_SIZE + 5
+        with tempfile.NamedTemporaryFile() as bf:
+            with h5py.File(bf.name, "w") as hf, FileEdgeAppender(hf) as buffered_hf:
+                buffered_hf.append_tensor(
+                    "foo",
+                    torch.tensor([-3, -2, -1], dtype=torch.long),
+                )
+                buffered_hf.append_tensor(
+                    "foo",
+                    torch.arange(large_size, dtype=torch.long),
+                )
+                buffered_hf.append_tensor(
+                    "foo",
+                    torch.tensor([-4], dtype=torch.long),
+                )
+
+            with h5py.File(bf.name, "r") as hf:
+                np.testing.assert_equal(
+                    hf["foo"],
+                    np.concatenate([
+                        np.array([-3, -2, -1], dtype=np.int64),
+                        np.arange(large_size, dtype=np.int64),
+                        np.array([-4], dtype=np.int64),
+                    ]),
+                )
+
     def test_tensor_list(self):
         with tempfile.NamedTemporaryFile() as bf:
             with h5py.File(bf.name, "w") as hf, FileEdgeAppender(hf) as buffered_hf:
@@ -100,6 +144,189 @@ class TestFileEdgeAppender(TestCase):
                     np.arange(1_000_000, dtype=np.int64),
                 )
 
+    def test_edges(self):
+        with tempfile.NamedTemporaryFile() as bf:
+            with h5py.File(bf.name, "w") as hf, FileEdgeAppender(hf) as buffered_hf:
+                buffered_hf.append_edges(EdgeList(
+                    EntityList.from_tensor(torch.tensor([0, 1], dtype=torch.long)),
+                    EntityList.from_tensor(torch.tensor([2, 3], dtype=torch.long)),
+                    torch.tensor([1, 0], dtype=torch.long),
+                ))
+                with self.assertRaises(ValueError):
+                    buffered_hf.append_edges(EdgeList(
+                        EntityList.from_tensor(torch.tensor([2 ** 31], dtype=torch.long)),
+                        EntityList.from_tensor(torch.tensor([0], dtype=torch.long)),
+                        torch.tensor([0], dtype=torch.long),
+                    ))
+
+            with h5py.File(bf.name, "r") as hf:
+                self.assertEqual(hf["lhs"].dtype, np.int32)
+                np.testing.assert_equal(hf["lhs"], np.array([0, 1], dtype=np.int32))
+                np.testing.assert_equal(hf["rhs"], np.array([2, 3], dtype=np.int32))
+                np.testing.assert_equal(hf["rel"], np.array([1, 0], dtype=np.int32))
+
+    def test_chunk_size(self):
+        large_size = BufferedDataset.BUFFER_SIZE + 1
+        with tempfile.NamedTemporaryFile() as bf:
+            with h5py.File(bf.name, "w") as hf, FileEdgeAppender(hf) as buffered_hf:
+                buffered_hf.append_tensor("small", torch.arange(3, dtype=torch.long))
+                buffered_hf.append_tensor("empty", torch.empty((0,), dtype=torch.long))
+                buffered_hf.append_tensor(
+                    "large", torch.arange(large_size, dtype=torch.int32), torch.int32)
+
+            with h5py.File(bf.name, "r") as hf:
+                self.assertEqual(hf["small"].chunks, (3,))
+                self.assertEqual(hf["empty"].chunks, (1,))
+                self.assertEqual(hf["large"].chunks, (BufferedDataset.CHUNK_BYTES // 4,))
+                np.testing.assert_equal(hf["large"], np.arange(large_size, dtype=np.int32))
+
+
+class TestFileEdgeStorage(TestCase):
+
+    def test_open_files(self):
+        def make_edges(offset):
+            return EdgeList(
+                EntityList.from_tensor(torch.arange(offset, offset + 3)),
+                EntityList.from_tensor(torch.arange(offset + 3, offset + 6)),
+                torch.tensor([0, 1, 0], dtype=torch.long),
+            )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = FileEdgeStorage(tmpdir)
+            storage.MAX_OPEN_FILES = 2
+            storage.prepare()
+            for p in range(3):
+                storage.save_edges(p, p, make_edges(10 * p))
+            for p in range(3):
+                self.assertEqual(storage.load_edges(p, p), make_edges(10 * p))
+            self.assertEqual(list(storage.open_files), [(1, 1), (2, 2)])
+
+            # Overwriting a bucket must not leave its old file open.
+            storage.save_edges(2, 2, make_edges(100))
+            self.assertEqual(storage.load_edges(2, 2), make_edges(100))
+            with self.assertRaises(RuntimeError):
+                storage.load_edges(0, 1)
+            storage.close()
+            self.assertEqual(len(storage.open_files), 0)
+
+    def test_version_mismatch(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = FileEdgeStorage(tmpdir)
+            with h5py.File(storage.get_edges_file(0, 0), "w") as hf:
+                hf.attrs[FORMAT_VERSION_ATTR] = FORMAT_VERSION + 1
+            with self.assertRaises(RuntimeError):
+                storage.load_edges(0, 0)
+            self.assertEqual(len(storage.open_files), 0)
+
+    def test_uncompressed_by_default(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = FileEdgeStorage(tmpdir)
+            storage.save_edges(0, 0, EdgeList(
+                EntityList.from_tensor(torch.tensor([0, 1], dtype=torch.long)),
+                EntityList.from_tensor(torch.tensor([2, 3], dtype=torch.long)),
+                torch.tensor([0, 0], dtype=torch.long),
+            ))
+            with h5py.File(storage.get_edges_file(0, 0), "r") as hf:
+                for dataset in hf.values():
+                    self.assertIsNone(dataset.compression)
+
+    @skipUnless(hdf5plugin is not None, "hdf5plugin is not installed")
+    def test_compressed(self):
+        edges = EdgeList(
+            EntityList.from_tensor_list(TensorList(
+                torch.tensor([0, 2, 2, 3], dtype=torch.long),
+                torch.tensor([4, 5, 6], dtype=torch.long),
+            )),
+            EntityList.from_tensor(torch.tensor([7, 8, 9], dtype=torch.long)),
+            torch.tensor([0, 0, 1], dtype=torch.long),
+        )
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                patch.object(BufferedDataset, "COMPRESS", True):
+            storage = FileEdgeStorage(tmpdir)
+            storage.save_edges(0, 0, edges)
+            with h5py.File(storage.get_edges_file(0, 0), "r") as hf:
+                self.assertIn("lhsd_data", hf)
+                for dataset in hf.values():
+                    self.assertIn(str(hdf5plugin.BLOSC_ID), dataset._filters)
+            self.assertEqual(storage.load_edges(0, 0), edges)
+            storage.close()
+
+
+class TestSingleFileEdgeStorage(TestCase):
+
+    def test_save_and_load(self):
+        edges_0_1 = EdgeList(
+            EntityList.from_tensor_list(TensorList(
+                torch.tensor([0, 2, 2, 3], dtype=torch.long),
+                torch.tensor([4, 5, 6], dtype=torch.long),
+            )),
+            EntityList.from_tensor(torch.tensor([7, 8, 9], dtype=torch.long)),
+            torch.tensor([0, 0, 1], dtype=torch.long),
+        )
+        edges_1_0 = EdgeList(
+            EntityList.from_tensor(torch.tensor([1, 2], dtype=torch.long)),
+            EntityList.from_tensor(torch.tensor([3, 4], dtype=torch.long)),
+            torch.tensor([1, 0], dtype=torch.long),
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = SingleFileEdgeStorage(f"hdf5://{tmpdir}")
+            storage.prepare()
+            self.assertFalse(storage.has_edges(0, 1))
+            storage.save_edges(0, 1, edges_1_0)
+            # Overwrites the bucket saved above.
+            storage.save_edges(0, 1, edges_0_1)
+            storage.save_edges(1, 0, edges_1_0)
+
+            self.assertTrue(storage.has_edges(0, 1))
+            self.assertTrue(storage.has_edges(1, 0))
+            self.assertFalse(storage.has_edges(1, 1))
+            self.assertEqual(storage.load_edges(0, 1), edges_0_1)
+            self.assertEqual(storage.load_edges(1, 0), edges_1_0)
+            self.assertEqual(
+                storage.load_chunk_of_edges(0, 1, chunk_idx=1, num_chunks=2),
+                edges_0_1[1:],
+            )
+            with self.assertRaises(RuntimeError):
+                storage.load_edges(1, 1)
+            storage.close()
+
+
+class TestAsyncEdgeLoader(TestCase):
+
+    def test_prefetch(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = FileEdgeStorage(tmpdir)
+            storage.prepare()
+            all_edges = {}
+            for lhs_p in range(2):
+                for rhs_p in range(2):
+                    offset = 10 * (2 * lhs_p + rhs_p)
+                    all_edges[lhs_p, rhs_p] = EdgeList(
+                        EntityList.from_tensor(torch.arange(offset, offset + 4)),
+                        EntityList.from_tensor(torch.arange(offset + 4, offset + 8)),
+                        torch.tensor([0, 1, 0, 1], dtype=torch.long),
+                    )
+                    storage.save_edges(lhs_p, rhs_p, all_edges[lhs_p, rhs_p])
+
+            loader = AsyncEdgeLoader(storage)
+            try:
+                loader.prefetch(0, 1)
+                # This evicts the previous prefetch.
+                loader.prefetch(1, 0)
+                self.assertEqual(loader.load_chunk_of_edges(1, 0), all_edges[1, 0])
+                self.assertEqual(loader.load_chunk_of_edges(0, 1), all_edges[0, 1])
+                loader.prefetch(1, 1, chunk_idx=1, num_chunks=2)
+                self.assertEqual(
+                    loader.load_chunk_of_edges(1, 1, chunk_idx=1, num_chunks=2),
+                    all_edges[1, 1][2:],
+                )
+                # Closing doesn't prevent further use.
+                loader.close()
+                loader.prefetch(0, 0)
+                self.assertEqual(loader.load_chunk_of_edges(0, 0), all_edges[0, 0])
+            finally:
+                loader.close()
+
 
 if __name__ == '__main__':
     main()
@@ -7,11 +7,13 @@
 # LICENSE.txt file in the root directory of this source tree.
 
 import argparse
+import array
 import random
 from itertools import chain
 from pathlib import Path
 from typing import Any, Counter, DefaultDict, Dict, List, Optional, Tuple
 
+import numpy as np
 import torch
 
 from torchbiggraph.config import (
@@ -161,7 +163,7 @@ def generate_entity_path_files(
 
 def generate_edge_path_files(
     edge_file_in: Path,
-    edge_path_out: Path,
+    edge_path_out: str,
     edge_storage: AbstractEdgeStorage,
     entities_by_type: Dict[str, Dictionary],
     relation_types: Dictionary,
@@ -182,8 +184,11 @@ def generate_edge_path_files(
 
     print(f"- Edges will be partitioned in {num_lhs_parts} x {num_rhs_parts} buckets.")
 
-    buckets: DefaultDict[Tuple[int, int], List[Tuple[int, int, int]]] = \
-        DefaultDict(list)
+    # Store the edges of each bucket as a flat array of int64 triplets, which
+    # takes far less memory than a list of tuples and converts to a tensor
+    # without copying.
+    buckets: DefaultDict[Tuple[int, int], array.array] = \
+        DefaultDict(lambda: array.array("q"))
     processed = 0
     skipped = 0
 
@@ -226,7 +231,7 @@ def generate_edge_path_files(
                 skipped += 1
                 continue
 
-            buckets[lhs_part, rhs_part].append((lhs_offset, rhs_offset, rel_id))
+            buckets[lhs_part, rhs_part].extend((lhs_offset, rhs_offset, rel_id))
 
             processed = processed + 1
             if processed % 100000 == 0:
@@ -240,9 +245,10 @@ def generate_edge_path_files(
 
     for i in range(num_lhs_parts):
         for j in range(num_rhs_parts):
+            edges = torch.from_numpy(
+                np.frombuffer(buckets[i, j], dtype=np.int64)).view((-1, 3))
             print(f"- Writing bucket ({i}, {j}), "
-                  f"containing {len(buckets[i, j])} edges...")
-            edges = torch.tensor(buckets[i, j], dtype=torch.long).view((-1, 3))
+                  f"containing {len(edges)} edges...")
             edge_storage.save_edges(i, j, EdgeList(
                 EntityList.from_tensor(edges[:, 0]),
                 EntityList.from_tensor(edges[:, 1]),
@@ -261,11 +267,18 @@ def convert_input_data(
     entity_min_count: int = 1,
     relation_type_min_count: int = 1,
     dynamic_relations: bool = False,
+    edge_paths_out: Optional[List[str]] = None,
 ) -> None:
     entity_storage = ENTITY_STORAGES.make_instance(entity_path)
     relation_type_storage = RELATION_TYPE_STORAGES.make_instance(entity_path)
-    edge_paths_out = [convert_path(ep) for ep in edge_paths]
-    edge_storages = [EDGE_STORAGES.make_instance(str(ep)) for ep in edge_paths_out]
+    # These are URLs, which can select another edge storage (e.g., hdf5://).
+    if edge_paths_out is None:
+        edge_paths_out = [str(convert_path(ep)) for ep in edge_paths]
+    elif len(edge_paths_out) != len(edge_paths):
+        raise RuntimeError(
+            f"Got {len(edge_paths_out)} output edge paths for "
+            f"{len(edge_paths)} input ones")
+    edge_storages = [EDGE_STORAGES.make_instance(ep) for ep in edge_paths_out]
 
     some_files_exists = []
     some_files_exists.extend(
@@ -285,7 +298,7 @@ def convert_input_data(
     if all(some_files_exists):
         print("Found some files that indicate that the input data "
               "has already been preprocessed, not doing it again.")
-        all_paths = ", ".join(str(p) for p in [entity_path] + edge_paths_out)
+        all_paths = ", ".join([entity_path] + edge_paths_out)
         print(f"These files are in: {all_paths}")
         return
 
@@ -381,6 +394,10 @@ def main():
                         help='Min count for relation types')
     parser.add_argument('--entity-min-count', type=int, default=1,
                         help='Min count for entities')
+    parser.add_argument('--edge-path-out', action='append', dest='edge_paths_out',
+                        help='Output edge path (or URL, e.g., hdf5://some/dir), '
+                             'once for each input file, in the same order; '
+                             'derived from the input file paths by default')
     opt = parser.parse_args()
 
     loader = ConfigFileLoader()
@@ -404,6 +421,7 @@ def main():
         opt.entity_min_count,
         opt.relation_type_min_count,
         dynamic_relations,
+        opt.edge_paths_out,
     )
 
 
@@ -201,6 +201,8 @@ def do_eval_and_report_stats(
 
             yield edge_path_idx, bucket, mean_bucket_stats
 
+        edge_storage.close()
+
         total_edge_path_stats = Stats.sum(all_edge_path_stats)
         all_stats.append(total_edge_path_stats)
         mean_edge_path_stats = total_edge_path_stats.average()
@@ -7,11 +7,12 @@
 # LICENSE.txt file in the root directory of this source tree.
 
 import argparse
-import random
-from itertools import chain
+from itertools import chain, compress, islice
 from pathlib import Path
+from typing import Optional
 
 import attr
+import numpy as np
 import pkg_resources
 
 from torchbiggraph.config import add_to_sys_path, ConfigFileLoader
@@ -32,6 +33,8 @@ FILENAMES = {
     'test': 'test.txt',
 }
 TRAIN_FRACTION = 0.75
+WRITE_BUFFER_SIZE = 2 ** 20  # 1MiB
+SPLIT_BATCH_SIZE = 2 ** 16  # lines
 
 # Figure out the path where the sample config was installed by the package manager.
 # This can be overridden with --config.
@@ -39,36 +42,38 @@ DEFAULT_CONFIG = pkg_resources.resource_filename("torchbiggraph.examples",
                                                  "configs/livejournal_config.py")
 
 
-def random_split_file(fpath: Path) -> None:
+def random_split_file(fpath: Path, seed: Optional[int] = None) -> None:
     train_file = fpath.parent / FILENAMES['train']
     test_file = fpath.parent / FILENAMES['test']
 
     if train_file.exists() and test_file.exists():
         print("Found some files that indicate that the input data "
-              "has already been shuffled and split, not doing it again.")
+              "has already been split, not doing it again.")
         print(f"These files are: {train_file} and {test_file}")
         return
 
-    print('Shuffling and splitting train/test file. This may take a while.')
+    print('Splitting train/test file. This may take a while.')
 
+    # Stream through the file and send each edge to either side at random, in
+    # constant memory. There's no need to shuffle the edges, as training does
+    # so anyways.
     print(f"Reading data from file: {fpath}")
-    with fpath.open("rt") as in_tf:
-        lines = in_tf.readlines()
-
-    # The first few lines are comments
-    lines = lines[4:]
-    print('Shuffling data')
-    random.shuffle(lines)
-    split_len = int(len(lines) * TRAIN_FRACTION)
-
-    print('Splitting to train and test files')
-    with train_file.open("wt") as out_tf_train:
-        for line in lines[:split_len]:
-            out_tf_train.write(line)
-
-    with test_file.open("wt") as out_tf_test:
-        for line in lines[split_len:]:
-            out_tf_test.write(line)
+    rng = np.random.default_rng(seed)
+    with fpath.open("rb") as in_bf, \
+            train_file.open("wb", buffering=WRITE_BUFFER_SIZE) as out_bf_train, \
+            test_file.open("wb", buffering=WRITE_BUFFER_SIZE) as out_bf_test:
+        # The first few lines are comments
+        lines = islice(in_bf, 4, None)
+        # Handle a whole batch of lines at once, drawing all their random
+        # numbers in one go and writing each side with a single call, as doing
+        # so one line at a time is much slower.
+        while True:
+            batch = list(islice(lines, SPLIT_BATCH_SIZE))
+            if not batch:
+                break
+            is_train = rng.random(len(batch)) < TRAIN_FRACTION
+            out_bf_train.writelines(compress(batch, is_train.tolist()))
+            out_bf_test.writelines(compress(batch, (~is_train).tolist()))
 
 
 def main():
@@ -79,6 +84,8 @@ def main():
     parser.add_argument('-p', '--param', action='append', nargs='*')
     parser.add_argument('--data_dir', type=Path, default='data',
                         help='where to save processed data')
+    parser.add_argument('--seed', type=int,
+                        help='seed for the random train/test split')
 
     args = parser.parse_args()
 
@@ -95,7 +102,7 @@ def main():
     print('Downloaded and extracted file.')
 
     # random split file for train and test
-    random_split_file(fpath)
+    random_split_file(fpath, args.seed)
 
     loader = ConfigFileLoader()
     config = loader.load_config(args.config, overrides)
@@ -51,6 +51,7 @@ class FilteredRankingEvaluator(RankingEvaluator):
             e_storage = EDGE_STORAGES.make_instance(path)
             # Assume unpartitioned.
             edges = e_storage.load_edges(Partition(0), Partition(0))
+            e_storage.close()
             for idx in range(len(edges)):
                 # Assume non-featurized.
                 cur_lhs = int(edges.lhs.to_tensor()[idx])
@@ -8,11 +8,14 @@
 
 import json
 import logging
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 from types import TracebackType
-from typing import ContextManager, Dict, List, Optional, Type
+from typing import Any, ContextManager, Dict, List, Optional, Set, Tuple, Type
 
 import h5py
 import numpy as np
@@ -24,6 +27,11 @@ from torchbiggraph.entitylist import EntityList
 from torchbiggraph.plugin import URLPluginRegistry
 from torchbiggraph.util import CouldNotLoadData
 
+try:
+    import hdf5plugin
+except ImportError:
+    hdf5plugin = None
+
 
 logger = logging.getLogger("torchbiggraph")
 
@@ -144,6 +152,10 @@ class AbstractEdgeStorage(ABC):
     ) -> ContextManager[AbstractEdgeAppender]:
         pass
 
+    def close(self) -> None:
+        """Release any resource (e.g., open files) held by the storage."""
+        pass
+
 
 ENTITY_STORAGES = URLPluginRegistry[AbstractEntityStorage]()
 RELATION_TYPE_STORAGES = URLPluginRegistry[AbstractRelationTypeStorage]()
@@ -165,7 +177,7 @@ def load_count(path: Path) -> int:
 
 def save_names(path: Path, names: List[str]) -> None:
     with path.open("wt") as tf:
-        json.dump(names, tf, indent=4)
+        json.dump(names, tf)
 
 
 def load_names(path: Path) -> List[str]:
@@ -184,12 +196,25 @@ class FileEntityStorage(AbstractEntityStorage):
         if path.startswith("file://"):
             path = path[len("file://"):]
         self.path = Path(path).resolve(strict=False)
+        # Memoize the paths, as they're requested many times for each partition.
+        self.count_files: Dict[Tuple[str, int], Path] = {}
+        self.names_files: Dict[Tuple[str, int], Path] = {}
 
     def get_count_file(self, entity_name: str, partition: int) -> Path:
-        return self.path / f"entity_count_{entity_name}_{partition}.txt"
+        try:
+            return self.count_files[entity_name, partition]
+        except KeyError:
+            path = self.path / f"entity_count_{entity_name}_{partition}.txt"
+            self.count_files[entity_name, partition] = path
+            return path
 
     def get_names_file(self, entity_name: str, partition: int) -> Path:
-        return self.path / f"entity_names_{entity_name}_{partition}.json"
+        try:
+            return self.names_files[entity_name, partition]
+        except KeyError:
+            path = self.path / f"entity_names_{entity_name}_{partition}.json"
+            self.names_files[entity_name, partition] = path
+            return path
 
     def prepare(self) -> None:
         self.path.mkdir(parents=True, exist_ok=True)
@@ -254,6 +279,22 @@ class FileRelationTypeStorage(AbstractRelationTypeStorage):
 FORMAT_VERSION_ATTR = "format_version"
 FORMAT_VERSION = 1
 
+# Size of the raw data chunk cache used when writing edge files, so that chunks
+# only partly filled by one write are still cached when the next one completes
+# them. Reads are faster with the default one. The number of slots should be a
+# prime number.
+RDCC_NBYTES = 2 ** 26  # 64MiB
+RDCC_NSLOTS = 100_003
+
+
+def get_compression_options() -> Dict[str, Any]:
+    # Blosc-LZ4 is fast enough not to slow down I/O. Byte-shuffling helps a lot
+    # with IDs, whose high bytes are mostly zero.
+    if hdf5plugin is None:
+        raise RuntimeError("Compressing edges requires the hdf5plugin package")
+    return dict(hdf5plugin.Blosc(
+        cname="lz4", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE))
+
 
 def torch_to_numpy_dtype(dtype):
     return torch.empty((), dtype=dtype).numpy().dtype
@@ -261,60 +302,119 @@ def torch_to_numpy_dtype(dtype):
 
 class BufferedDataset:
 
-    DATA_TYPE = torch.long  # int64, 8 bytes
-    BUFFER_SIZE = 2 ** 20 // 8  # 1MiB
-
-    def __init__(self, hf: h5py.File, dataset_name: str) -> None:
-        self.hf: h5py.File = hf
+    DATA_TYPE = torch.long
+    # In number of elements, whatever their type (e.g., 8MiB for int64 and 4MiB
+    # for int32).
+    BUFFER_SIZE = 2 ** 20
+    # In bytes. Chunks are allocated in full on disk, hence datasets that are
+    # written all at once get chunks just as large as them instead.
+    CHUNK_BYTES = 2 ** 22  # 4MiB
+    # Opt-in, as reading the datasets back then also requires hdf5plugin.
+    COMPRESS = False
+
+    def __init__(
+        self,
+        hf: h5py.Group,
+        dataset_name: str,
+        data_type: torch.dtype = DATA_TYPE,
+    ) -> None:
+        self.hf: h5py.Group = hf
         self.dataset_name: str = dataset_name
-        self.dataset: h5py.Dataset = self.hf.create_dataset(
+        self.data_type: torch.dtype = data_type
+        # Created when first written to, once the chunk size can be decided.
+        self.dataset: Optional[h5py.Dataset] = None
+        self.buffer: torch.Tensor = torch.empty(
+            (self.BUFFER_SIZE,), dtype=self.data_type)
+        self.buffer_array: np.ndarray = self.buffer.numpy()
+        self.buffer_offset: int = 0
+        self.total_data: int = 0
+        self.buffer_pinned: bool = False
+        self.pending_gpu_copies: bool = False
+
+    def create_dataset(self, max_chunk_size: Optional[int] = None) -> h5py.Dataset:
+        dtype = torch_to_numpy_dtype(self.data_type)
+        chunk_size = self.CHUNK_BYTES // dtype.itemsize
+        if max_chunk_size is not None:
+            chunk_size = max(min(chunk_size, max_chunk_size), 1)
+        return self.hf.create_dataset(
             name=self.dataset_name,
-            dtype=torch_to_numpy_dtype(self.DATA_TYPE),
+            dtype=dtype,
             shape=(0,),
-            chunks=(self.BUFFER_SIZE,),
+            chunks=(chunk_size,),
             maxshape=(None,),
+            **(get_compression_options() if self.COMPRESS else {}),
         )
-        self.buffer: torch.Tensor = torch.empty((self.BUFFER_SIZE,), dtype=self.DATA_TYPE)
-        self.buffer_offset: int = 0
-        self.total_data: int = 0
+
+    def write_to_dataset(self, array: np.ndarray) -> None:
+        if self.dataset is None:
+            self.dataset = self.create_dataset()
+        old_size = self.dataset.shape[0]
+        new_size = old_size + len(array)
+        self.dataset.resize(new_size, axis=0)
+        # write_direct needs a C-contiguous source.
+        self.dataset.write_direct(
+            np.ascontiguousarray(array), dest_sel=np.s_[old_size:new_size])
+
+    def copy_to_buffer(self, tensor: torch.Tensor) -> None:
+        tensor_size, = tensor.shape
+        # Pinned memory allows copies from the GPU to happen asynchronously.
+        # It's only switched to once such a copy happens, in order not to set
+        # up CUDA for writers that never need it.
+        if tensor.is_cuda and not self.buffer_pinned:
+            self.buffer = self.buffer.pin_memory()
+            self.buffer_array = self.buffer.numpy()
+            self.buffer_pinned = True
+        self.buffer[self.buffer_offset:self.buffer_offset + tensor_size].copy_(
+            tensor, non_blocking=True)
+        self.buffer_offset += tensor_size
+        if tensor.is_cuda:
+            self.pending_gpu_copies = True
 
     def flush_buffer(self, _last: bool = False) -> None:
         if not _last:
             assert self.buffer_offset == self.BUFFER_SIZE
         elif self.buffer_offset == 0:
             return
+        if self.pending_gpu_copies:
+            torch.cuda.current_stream().synchronize()
+            self.pending_gpu_copies = False
         logger.info(f"Flushing one chunk of {self.buffer_offset} elements "
-                    f"to dataset {self.dataset_name!r} of file {self.hf.filename}")
-        self.dataset.resize(self.dataset.shape[0] + self.buffer_offset, axis=0)
-        self.dataset[-self.buffer_offset:] = self.buffer[:self.buffer_offset].numpy()
+                    f"to dataset {self.dataset_name!r} of file {self.hf.file.filename}")
+        self.write_to_dataset(self.buffer_array[:self.buffer_offset])
         self.buffer_offset = 0
 
+    def close(self) -> None:
+        if self.dataset is None:
+            # The buffer holds all the data there will ever be.
+            self.dataset = self.create_dataset(max_chunk_size=self.buffer_offset)
+        self.flush_buffer(_last=True)
+
     def append(self, tensor: torch.Tensor) -> None:
         tensor_size, = tensor.shape
-        tensor_offset = 0
-        while True:
-            tensor_left = tensor_size - tensor_offset
-            buffer_left = self.BUFFER_SIZE - self.buffer_offset
-            if tensor_left >= buffer_left:
-                self.buffer[self.buffer_offset:self.buffer_offset + buffer_left] = \
-                    tensor[tensor_offset:tensor_offset + buffer_left]
-                tensor_offset += buffer_left
-                self.buffer_offset += buffer_left
-                self.flush_buffer()
-                continue
-            else:
-                self.buffer[self.buffer_offset:self.buffer_offset + tensor_left] = \
-                    tensor[tensor_offset:tensor_offset + tensor_left]
-                tensor_offset += tensor_left
-                self.buffer_offset += tensor_left
-                break
+        buffer_left = self.BUFFER_SIZE - self.buffer_offset
+        if tensor_size >= self.BUFFER_SIZE:
+            # Large tensors bypass the buffer entirely, once what it contains
+            # has been written out to preserve the order of the data.
+            self.flush_buffer(_last=True)
+            self.write_to_dataset(tensor.cpu().numpy())
+        elif tensor_size < buffer_left:
+            self.copy_to_buffer(tensor)
+        else:
+            self.copy_to_buffer(tensor[:buffer_left])
+            self.flush_buffer()
+            self.copy_to_buffer(tensor[buffer_left:])
         self.total_data += tensor_size
 
 
 class FileEdgeAppender(AbstractEdgeAppender):
 
-    def __init__(self, hf: h5py.File) -> None:
-        self.hf: h5py.File = hf
+    # Entity offsets and relation types are stored on 32 bits, which only falls
+    # short if a partition has more than 2^31 entities. They're read back as
+    # int64, so this only halves the size of the files.
+    ID_DATA_TYPE = torch.int32
+
+    def __init__(self, hf: h5py.Group) -> None:
+        self.hf: h5py.Group = hf
         self.datasets: Dict[str, BufferedDataset] = {}
 
     def __enter__(self) -> "FileEdgeAppender":
@@ -327,14 +427,24 @@ class FileEdgeAppender(AbstractEdgeAppender):
         traceback: Optional[TracebackType],
     ) -> None:
         for dataset in self.datasets.values():
-            dataset.flush_buffer(_last=True)
-        self.hf.close()
+            dataset.close()
 
-    def append_tensor(self, name: str, tensor: torch.Tensor) -> None:
+    def append_tensor(
+        self,
+        name: str,
+        tensor: torch.Tensor,
+        data_type: torch.dtype = BufferedDataset.DATA_TYPE,
+    ) -> None:
         if name not in self.datasets:
-            self.datasets[name] = BufferedDataset(self.hf, name)
+            self.datasets[name] = BufferedDataset(self.hf, name, data_type)
         self.datasets[name].append(tensor)
 
+    def append_ids(self, name: str, tensor: torch.Tensor) -> None:
+        info = torch.iinfo(self.ID_DATA_TYPE)
+        if len(tensor) > 0 and (tensor.min() < info.min or tensor.max() > info.max):
+            raise ValueError(f"Some values for {name} don't fit in {self.ID_DATA_TYPE}")
+        self.append_tensor(name, tensor.to(self.ID_DATA_TYPE), self.ID_DATA_TYPE)
+
     def append_tensor_list(self, name: str, tensor_list: TensorList) -> None:
         offsets_name = f"{name}_offsets"
         data_name = f"{name}_data"
@@ -349,9 +459,9 @@ class FileEdgeAppender(AbstractEdgeAppender):
         self.datasets[data_name].append(data)
 
     def append_edges(self, edgelist: EdgeList) -> None:
-        self.append_tensor("lhs", edgelist.lhs.tensor)
-        self.append_tensor("rhs", edgelist.rhs.tensor)
-        self.append_tensor("rel", edgelist.rel)
+        self.append_ids("lhs", edgelist.lhs.tensor)
+        self.append_ids("rhs", edgelist.rhs.tensor)
+        self.append_ids("rel", edgelist.rel)
         if len(edgelist.lhs.tensor_list.data) != 0:
             self.append_tensor_list("lhsd", edgelist.lhs.tensor_list)
         if len(edgelist.rhs.tensor_list.data) != 0:
@@ -366,18 +476,57 @@ class FileEdgeStorage(AbstractEdgeStorage):
 
     Edge lists are stored as hdf5 allowing partial reads (for multi-pass).
 
-    Currently simple implementation but should eventually be multi-threaded /
-    pipelined.
+    The files of the most recently loaded buckets are kept open, so that
+    loading them again (e.g., in the next epoch) doesn't need to reopen them.
     """
 
+    MAX_OPEN_FILES = 32
+
     def __init__(self, path: str) -> None:
         if path.startswith("file://"):
             path = path[len("file://"):]
         self.path = Path(path).resolve(strict=False)
+        self.lock = threading.Lock()
+        # FIXME In py-3.7 switch to typing.OrderedDict[Tuple[int, int], h5py.File].
+        self.open_files: OrderedDict = OrderedDict()
 
     def get_edges_file(self, lhs_p: int, rhs_p: int) -> Path:
         return self.path / f"edges_{lhs_p}_{rhs_p}.h5"
 
+    def open_for_reading(self, lhs_p: int, rhs_p: int) -> h5py.File:
+        # Must be called with the lock held.
+        try:
+            self.open_files.move_to_end((lhs_p, rhs_p))
+        except KeyError:
+            pass
+        else:
+            return self.open_files[lhs_p, rhs_p]
+        file_path = self.get_edges_file(lhs_p, rhs_p)
+        if not file_path.is_file():
+            raise RuntimeError(f"{file_path} does not exist")
+        hf = h5py.File(file_path, 'r')
+        # Checked only once, when opening, rather than at each load.
+        if hf.attrs.get(FORMAT_VERSION_ATTR, None) != FORMAT_VERSION:
+            hf.close()
+            raise RuntimeError(f"Version mismatch in edge file {file_path}")
+        self.open_files[lhs_p, rhs_p] = hf
+        while len(self.open_files) > self.MAX_OPEN_FILES:
+            _, old_hf = self.open_files.popitem(last=False)
+            old_hf.close()
+        return hf
+
+    def close_file(self, lhs_p: int, rhs_p: int) -> None:
+        with self.lock:
+            hf = self.open_files.pop((lhs_p, rhs_p), None)
+            if hf is not None:
+                hf.close()
+
+    def close(self) -> None:
+        with self.lock:
+            for hf in self.open_files.values():
+                hf.close()
+            self.open_files.clear()
+
     def prepare(self) -> None:
         self.path.mkdir(parents=True, exist_ok=True)
 
@@ -395,41 +544,45 @@ class FileEdgeStorage(AbstractEdgeStorage):
         chunk_idx: int = 0,
         num_chunks: int = 1,
     ) -> EdgeList:
-        file_path = self.get_edges_file(lhs_p, rhs_p)
-        if not file_path.is_file():
-            raise RuntimeError(f"{file_path} does not exist")
-        with h5py.File(file_path, 'r') as hf:
-            if hf.attrs.get(FORMAT_VERSION_ATTR, None) != FORMAT_VERSION:
-                raise RuntimeError(f"Version mismatch in edge file {file_path}")
-            lhs_ds = hf['lhs']
-            rhs_ds = hf['rhs']
-            rel_ds = hf['rel']
-
-            num_edges = rel_ds.len()
-            begin = int(chunk_idx * num_edges / num_chunks)
-            end = int((chunk_idx + 1) * num_edges / num_chunks)
-            chunk_size = end - begin
-
-            lhs = torch.empty((chunk_size,), dtype=torch.long)
-            rhs = torch.empty((chunk_size,), dtype=torch.long)
-            rel = torch.empty((chunk_size,), dtype=torch.long)
-
-            # Needed because https://github.com/h5py/h5py/issues/870.
-            if chunk_size > 0:
-                lhs_ds.read_direct(lhs.numpy(), source_sel=np.s_[begin:end])
-                rhs_ds.read_direct(rhs.numpy(), source_sel=np.s_[begin:end])
-                rel_ds.read_direct(rel.numpy(), source_sel=np.s_[begin:end])
-
-            lhsd = self.read_dynamic(hf, 'lhsd', begin, end)
-            rhsd = self.read_dynamic(hf, 'rhsd', begin, end)
-
-            return EdgeList(EntityList(lhs, lhsd),
-                            EntityList(rhs, rhsd),
-                            rel)
+        with self.lock:
+            hf = self.open_for_reading(lhs_p, rhs_p)
+            return self.read_edges(hf, chunk_idx, num_chunks)
+
+    @staticmethod
+    def read_edges(
+        hf: h5py.Group,
+        chunk_idx: int,
+        num_chunks: int,
+    ) -> EdgeList:
+        lhs_ds = hf['lhs']
+        rhs_ds = hf['rhs']
+        rel_ds = hf['rel']
+
+        num_edges = rel_ds.len()
+        begin = int(chunk_idx * num_edges / num_chunks)
+        end = int((chunk_idx + 1) * num_edges / num_chunks)
+        chunk_size = end - begin
+
+        lhs = torch.empty((chunk_size,), dtype=torch.long)
+        rhs = torch.empty((chunk_size,), dtype=torch.long)
+        rel = torch.empty((chunk_size,), dtype=torch.long)
+
+        # Needed because https://github.com/h5py/h5py/issues/870.
+        if chunk_size > 0:
+            lhs_ds.read_direct(lhs.numpy(), source_sel=np.s_[begin:end])
+            rhs_ds.read_direct(rhs.numpy(), source_sel=np.s_[begin:end])
+            rel_ds.read_direct(rel.numpy(), source_sel=np.s_[begin:end])
+
+        lhsd = FileEdgeStorage.read_dynamic(hf, 'lhsd', begin, end)
+        rhsd = FileEdgeStorage.read_dynamic(hf, 'rhsd', begin, end)
+
+        return EdgeList(EntityList(lhs, lhsd),
+                        EntityList(rhs, rhsd),
+                        rel)
 
     @staticmethod
     def read_dynamic(
-        hf: h5py.File,
+        hf: h5py.Group,
         key: str,
         begin: int,
         end: int,
@@ -443,18 +596,18 @@ class FileEdgeStorage(AbstractEdgeStorage):
                 offsets=torch.zeros((), dtype=torch.long).expand(end - begin + 1),
                 data=torch.empty((0,), dtype=torch.long))
 
-        offsets = torch.empty((end - begin + 1,), dtype=torch.long)
-        offsets_ds.read_direct(offsets.numpy(), source_sel=np.s_[begin:end + 1])
-        data_begin = offsets[0].item()
-        data_end = offsets[-1].item()
-        data = torch.empty((data_end - data_begin,), dtype=torch.long)
+        offsets = np.empty((end - begin + 1,), dtype=np.int64)
+        offsets_ds.read_direct(offsets, source_sel=np.s_[begin:end + 1])
+        data_begin = int(offsets[0])
+        data_end = int(offsets[-1])
+        data = np.empty((data_end - data_begin,), dtype=np.int64)
         # Needed because https://github.com/h5py/h5py/issues/870.
         if data_end - data_begin > 0:
-            data_ds.read_direct(data.numpy(), source_sel=np.s_[data_begin:data_end])
+            data_ds.read_direct(data, source_sel=np.s_[data_begin:data_end])
 
-        offsets -= int(offsets[0])
+        offsets -= data_begin
 
-        return TensorList(offsets, data)
+        return TensorList(torch.from_numpy(offsets), torch.from_numpy(data))
 
     @contextmanager
     def save_edges_by_appending(
@@ -466,7 +619,165 @@ class FileEdgeStorage(AbstractEdgeStorage):
         tmp_file_path = file_path.parent / f"{file_path.stem}.tmp{file_path.suffix}"
         if tmp_file_path.is_file():
             tmp_file_path.unlink()
-        with h5py.File(tmp_file_path, "x") as hf, FileEdgeAppender(hf) as appender:
+        with h5py.File(
+            tmp_file_path, "x", rdcc_nbytes=RDCC_NBYTES, rdcc_nslots=RDCC_NSLOTS,
+        ) as hf, FileEdgeAppender(hf) as appender:
             hf.attrs[FORMAT_VERSION_ATTR] = FORMAT_VERSION
             yield appender
+        # Don't keep reading the file that is being replaced.
+        self.close_file(lhs_p, rhs_p)
         tmp_file_path.rename(file_path)
+
+
+@EDGE_STORAGES.register_as("hdf5")
+class SingleFileEdgeStorage(AbstractEdgeStorage):
+    """Stores the edgelists of all buckets in a single HDF5 file.
+
+    Each bucket is a group of that file, with the same content as the files of
+    FileEdgeStorage. The file is opened for reading only once and then kept
+    open, which saves the cost of opening a file for each bucket.
+    """
+
+    def __init__(self, path: str) -> None:
+        if path.startswith("hdf5://"):
+            path = path[len("hdf5://"):]
+        self.path = Path(path).resolve(strict=False)
+        self.lock = threading.Lock()
+        self.hf: Optional[h5py.File] = None
+        # The groups whose format version has been checked since opening.
+        self.verified_groups: Set[str] = set()
+
+    def get_edges_file(self) -> Path:
+        return self.path / "edges.h5"
+
+    @staticmethod
+    def get_bucket_group(lhs_p: int, rhs_p: int) -> str:
+        return f"edges_{lhs_p}_{rhs_p}"
+
+    def prepare(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def open_for_reading(self) -> h5py.File:
+        with self.lock:
+            if self.hf is None:
+                file_path = self.get_edges_file()
+                if not file_path.is_file():
+                    raise RuntimeError(f"{file_path} does not exist")
+                self.hf = h5py.File(file_path, "r")
+            return self.hf
+
+    def close(self) -> None:
+        with self.lock:
+            if self.hf is not None:
+                self.hf.close()
+                self.hf = None
+            self.verified_groups.clear()
+
+    def has_edges(
+        self,
+        lhs_p: int,
+        rhs_p: int,
+    ) -> bool:
+        if not self.get_edges_file().is_file():
+            return False
+        return self.get_bucket_group(lhs_p, rhs_p) in self.open_for_reading()
+
+    def load_chunk_of_edges(
+        self,
+        lhs_p: int,
+        rhs_p: int,
+        chunk_idx: int = 0,
+        num_chunks: int = 1,
+    ) -> EdgeList:
+        hf = self.open_for_reading()
+        group_name = self.get_bucket_group(lhs_p, rhs_p)
+        if group_name not in hf:
+            raise RuntimeError(f"{group_name} does not exist in {hf.filename}")
+        group = hf[group_name]
+        if group_name not in self.verified_groups:
+            if group.attrs.get(FORMAT_VERSION_ATTR, None) != FORMAT_VERSION:
+                raise RuntimeError(f"Version mismatch in {group_name} of {hf.filename}")
+            self.verified_groups.add(group_name)
+        return FileEdgeStorage.read_edges(group, chunk_idx, num_chunks)
+
+    @contextmanager
+    def save_edges_by_appending(
+        self,
+        lhs_p: int,
+        rhs_p: int,
+    ) -> ContextManager[AbstractEdgeAppender]:
+        # The file can't be open for reading and writing at the same time.
+        self.close()
+        group_name = self.get_bucket_group(lhs_p, rhs_p)
+        tmp_group_name = f"{group_name}.tmp"
+        with self.lock, h5py.File(
+            self.get_edges_file(), "a",
+            rdcc_nbytes=RDCC_NBYTES, rdcc_nslots=RDCC_NSLOTS,
+        ) as hf:
+            if tmp_group_name in hf:
+                del hf[tmp_group_name]
+            group = hf.create_group(tmp_group_name)
+            group.attrs[FORMAT_VERSION_ATTR] = FORMAT_VERSION
+            with FileEdgeAppender(group) as appender:
+                yield appender
+            if group_name in hf:
+                del hf[group_name]
+            hf.move(tmp_group_name, group_name)
+
+
+class AsyncEdgeLoader:
+    """Wraps an edge storage to load chunks of edges ahead of time.
+
+    Prefetched chunks are loaded in a background thread (rather than process)
+    so that they can be handed over without pickling them. At most a few of
+    them are kept around: if too many are requested the oldest are dropped.
+    The thread is started when first needed, and stopped when closing, after
+    which the loader can still be used again.
+    """
+
+    def __init__(self, storage: AbstractEdgeStorage, max_prefetched: int = 1) -> None:
+        self.storage: AbstractEdgeStorage = storage
+        self.max_prefetched: int = max_prefetched
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # FIXME In py-3.7 switch to typing.OrderedDict[Tuple[...], Future].
+        self.outstanding: OrderedDict = OrderedDict()
+
+    def prefetch(
+        self,
+        lhs_p: int,
+        rhs_p: int,
+        chunk_idx: int = 0,
+        num_chunks: int = 1,
+    ) -> None:
+        key = (lhs_p, rhs_p, chunk_idx, num_chunks)
+        if key in self.outstanding:
+            return
+        while len(self.outstanding) >= self.max_prefetched:
+            _, future = self.outstanding.popitem(last=False)
+            future.cancel()
+        logger.debug(f"Prefetching chunk {chunk_idx} of edges of bucket "
+                     f"({lhs_p}, {rhs_p})")
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        self.outstanding[key] = self.executor.submit(
+            self.storage.load_chunk_of_edges, *key)
+
+    def load_chunk_of_edges(
+        self,
+        lhs_p: int,
+        rhs_p: int,
+        chunk_idx: int = 0,
+        num_chunks: int = 1,
+    ) -> EdgeList:
+        future = self.outstanding.pop((lhs_p, rhs_p, chunk_idx, num_chunks), None)
+        if future is not None:
+            return future.result()
+        return self.storage.load_chunk_of_edges(lhs_p, rhs_p, chunk_idx, num_chunks)
+
+    def close(self) -> None:
+        for future in self.outstanding.values():
+            future.cancel()
+        self.outstanding.clear()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -48,7 +48,11 @@ from torchbiggraph.distributed import (
 )
 from torchbiggraph.edgelist import EdgeList
 from torchbiggraph.eval import RankingEvaluator
-from torchbiggraph.graph_storages import EDGE_STORAGES, ENTITY_STORAGES
+from torchbiggraph.graph_storages import (
+    AsyncEdgeLoader,
+    EDGE_STORAGES,
+    ENTITY_STORAGES,
+)
 from torchbiggraph.losses import AbstractLossFunction, LOSS_FUNCTIONS
 from torchbiggraph.model import (
     MultiRelationEmbedder,
@@ -621,13 +625,24 @@ def train_and_report_stats(
                 Stats.from_dict(stats["eval_stats_after"]),
             )
 
+    # Reuse the storages across epochs, as they may cache some resources.
+    edge_storages = [EDGE_STORAGES.make_instance(edge_path)
+                     for edge_path in iteration_manager.edge_paths]
+    edge_loaders = [AsyncEdgeLoader(edge_storage) for edge_storage in edge_storages]
+    last_edge_path_idx: Optional[int] = None
+
     # Start of the main training loop.
     for epoch_idx, edge_path_idx, edge_chunk_idx in iteration_manager:
         logger.info(
             f"Starting epoch {epoch_idx + 1} / {iteration_manager.num_epochs}, "
             f"edge path {edge_path_idx + 1} / {iteration_manager.num_edge_paths}, "
             f"edge chunk {edge_chunk_idx + 1} / {iteration_manager.num_edge_chunks}")
-        edge_storage = EDGE_STORAGES.make_instance(iteration_manager.edge_path)
+        # Only keep the resources of one edge path at a time.
+        if last_edge_path_idx is not None and last_edge_path_idx != edge_path_idx:
+            edge_loaders[last_edge_path_idx].close()
+            edge_storages[last_edge_path_idx].close()
+        last_edge_path_idx = edge_path_idx
+        edge_loader = edge_loaders[edge_path_idx]
         logger.info(f"Edge path: {iteration_manager.edge_path}")
 
         sync.barrier()
@@ -676,7 +691,7 @@ def train_and_report_stats(
                 checkpoint_manager.record_marker(current_index)
 
             bucket_logger.debug("Loading edges")
-            edges = edge_storage.load_chunk_of_edges(
+            edges = edge_loader.load_chunk_of_edges(
                 cur_b.lhs, cur_b.rhs, edge_chunk_idx, config.num_edge_chunks)
             num_edges = len(edges)
             # this might be off in the case of tensorlist or extra edge fields
@@ -684,6 +699,12 @@ def train_and_report_stats(
             io_bytes += edges.rhs.tensor.numel() * edges.rhs.tensor.element_size()
             io_bytes += edges.rel.numel() * edges.rel.element_size()
 
+            if next_b is not None and background_io:
+                # Load the next bucket's edges while this one is being trained.
+                bucket_logger.debug("Prefetching edges")
+                edge_loader.prefetch(
+                    next_b.lhs, next_b.rhs, edge_chunk_idx, config.num_edge_chunks)
+
             bucket_logger.debug("Shuffling edges")
             # Fix a seed to get the same permutation every time; have it
             # depend on all and only what affects the set of edges.
@@ -858,6 +879,9 @@ def train_and_report_stats(
 
     sync.barrier()
 
+    for edge_loader, edge_storage in zip(edge_loaders, edge_storages):
+        edge_loader.close()
+        edge_storage.close()
     checkpoint_manager.close()
     if loadpath_manager is not None:
         loadpath_manager.close()